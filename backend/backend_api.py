@@ -4,13 +4,24 @@ Provides authentication via OTP and search functionality.
 """
 
 import os
-import json
+import hashlib
+import numpy as np
+import orjson
 import pandas as pd
+import pyarrow as pa
 import requests
 import datetime
 import time
 import math
-from flask import Flask, request, jsonify
+import sqlite3
+import threading
+import functools
+import http.cookiejar
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from cachetools import LRUCache, TTLCache
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
 from typing import Optional, Dict, List
@@ -32,10 +43,23 @@ OPENROUTESERVICE_API_KEY = os.environ.get('OPEN_ROUTE_SERVICE_KEY')
 MY_EMAIL = os.environ.get('EMAIL')
 KINDRED_URL = "https://app.livekindred.com/api/graphql"
 
-# Load resort locations
+# Concurrency limits for the Kindred search fan-out
+KINDRED_MAX_WORKERS = int(os.environ.get('KINDRED_MAX_WORKERS', 16))
+KINDRED_MAX_QPS = float(os.environ.get('KINDRED_MAX_QPS', 8))
+
+# Concurrency limits for OpenRouteService lookups. The default rate is the free tier's
+# 40 requests/min, split across gunicorn worker processes; paid plans can raise ORS_MAX_QPS.
+ORS_MAX_WORKERS = int(os.environ.get('ORS_MAX_WORKERS', 8))
+ORS_MAX_QPS = float(os.environ.get('ORS_MAX_QPS', 40 / 60 / int(os.environ.get('WEB_CONCURRENCY', 1))))
+
+# Homes farther than this multiple of the search radius (as the crow flies) skip the ORS lookup
+ORS_PREFILTER_FACTOR = 1.3
+EARTH_RADIUS_MILES = 3958.8
+
+# Load resort locations into typed, Arrow-backed columns
 script_dir = os.path.dirname(os.path.abspath(__file__))
 csv_path = os.path.join(script_dir, 'resort_locations_20256.csv')
-locations = pd.read_csv(csv_path)
+locations = pd.read_csv(csv_path, engine='pyarrow', dtype_backend='pyarrow')
 locations.columns = locations.columns.str.lower()
 locations.rename(columns={
     'resortregion': 'region',
@@ -45,6 +69,29 @@ locations.rename(columns={
     'annualsnowfall': 'annual_snowfall'
 }, inplace=True)
 
+# Numeric columns used by the /api/search filters, as plain arrays
+RESORT_FILTER_ARRAYS = {
+    col: locations[col].to_numpy(dtype=np.float32, na_value=np.nan)
+    for col in ('skiable_acres', 'vertical_drop', 'annual_snowfall')
+}
+
+
+def _records(df: pd.DataFrame, columns: List[str]) -> List[dict]:
+    """Return the given resort columns as plain-Python records. Arrow nulls come out as None (null in JSON)."""
+    return pa.Table.from_pandas(df[columns], preserve_index=False).to_pylist()
+
+
+# The resort CSV never changes at runtime, so the /api/resorts* payloads are serialized once
+RESORT_REGIONS = sorted(locations['region'].dropna().unique().tolist())
+RESORTS_JSON = orjson.dumps({
+    "regions": RESORT_REGIONS,
+    "resorts": _records(locations, ['resort', 'region', 'state', 'latitude', 'longitude'])
+})
+RESORT_STATS_JSON = orjson.dumps({
+    "resorts": _records(locations, ['resort', 'region', 'state', 'skiable_acres', 'vertical_drop', 'annual_snowfall']),
+    "regions": RESORT_REGIONS
+})
+
 
 class _TokenBox:
     """Holds the current access token so it can be updated when refreshed."""
@@ -55,6 +102,41 @@ class _TokenBox:
 token_box = _TokenBox(KINDRED_BEARER_TOKEN)
 
 
+class _RateLimiter:
+    """Token bucket shared across threads to stay under an upstream QPS limit."""
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+kindred_limiter = _RateLimiter(KINDRED_MAX_QPS)
+
+# One pool for the per-resort fan-out
+search_executor = ThreadPoolExecutor(max_workers=KINDRED_MAX_WORKERS, thread_name_prefix='kindred-search')
+
+# Shared keep-alive session for all Kindred requests. Auth is per-request via headers,
+# so cookies are never stored (they would otherwise leak between users).
+kindred_session = requests.Session()
+kindred_session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+kindred_session.mount('https://', HTTPAdapter(pool_connections=32, pool_maxsize=64))
+
+
 def _build_headers(token: Optional[str] = None) -> dict:
     """Build headers for Kindred API requests. Uses provided token or falls back to token_box."""
     auth_token = token if token else token_box.access
@@ -97,89 +179,59 @@ mutation FinishEmailLoginUser($deviceId: String, $email: String!, $emailToken: S
 }
 """
 
-QUERY_EXPLORE_LIST = """
-query exploreList($filter: FlexibleSearchFilter!, $pagination: Pagination!, $sortedAt: Date!, $width: Int!, $avatarWidth: Int!) {
-  getHomesWithSearchCriteria(filter: $filter, pagination: $pagination, sortedAt: $sortedAt) {
+# Selection set for getHomesWithSearchCriteria, shared by the single and batched queries.
+# Only the fields read by _parse_home_recs are requested.
+EXPLORE_LIST_SELECTION = """{
     page
     hasMore
-    didFindPerfectMatches
     homeRecs {
       home {
         ...HomeCardData
       }
-      matchingStatus { ...SearchResultScore }
-      household { ...SearchHousehold }
     }
-  }
-}
+  }"""
+
+# Thumbnail width is the same for every search, so it is inlined rather than sent as a variable
+THUMBNAIL_WIDTH = 720
 
+EXPLORE_LIST_FRAGMENTS = """
 fragment HomeCardData on Home {
   id
-  status
-  destination { id name region }
-  media { url thumbnailUrl(width: $width) }
   title
-  titleV2 { translation originalLanguage }
+  destination { name }
+  media { thumbnailUrl(width: """ + str(THUMBNAIL_WIDTH) + """) }
+  lat
+  lon
   availabilitiesWithoutBookedDates { ...HomeAvailability }
-  swapAvailabilitiesV2 { ...SwapAvailabilities }
-  isFavorite
-  homeProfileProgress
   maxGuestsLimit
-  workspacesCount
-  bathrooms
-  bedroomsCount
-  bedsCount
   petPreference
   petHostingDetails
-  lat
-  lon
-  preSelect { ...PreSelectDates }
-  swapQuality
-  owner { id displayName isOpenForInquiry }
-  swapAvailabilitiesV2 { destinationIds destinationNames }
-  excludeHomeMediaFromMarketing
-  pricingPreview { ...PublicPreviewPricing }
-  restrictionReasons
+  bedroomsCount
+  bathrooms
 }
 
 fragment HomeAvailability on HomeAvailability { id homeId startDate endDate }
-fragment SwapAvailabilities on HomeSwapAvailability {
-  id swapAvailabilityId start end tripLengthsV2 minimumNights dateRanges
-  destinationIds destinationNames destinationName travelPlanId
-  travelPlan {
-    tripTypes { ...HomeTripType }
-    minBedrooms minBathrooms minBeds totalGuests
-    homeFilters { ...HomeFilters }
-  }
-  swapDestination { name }
-}
-fragment HomeTripType on HomeTripType { name displayName photoUrl }
-fragment HomeFilters on HomeFilter {
-  ... on AmenityFilter { __typename amenity enabled }
-  ... on PetPreferenceFilter { __typename petPreference enabled }
-  ... on BedTypeFilter { __typename bed enabled }
-  ... on CompositeHomeFilter { __typename compositeFilter enabled }
-}
-fragment PreSelectDates on PreSelect { dateRange isSwap }
-fragment PublicPreviewPricing on PricingPreviewPublic {
-  fees { ...TripPricingFee }
-  totalMoney { ...TripMoneyDisplay }
-  moneyPerNight { ...TripMoneyDisplay }
-  credit { totalCredits }
-  pricingComparison { totalMoney { amount currency } moneyPerNight { ...TripMoneyDisplay } totalNights }
-}
-fragment TripPricingFee on PricingFee { type total { amount currency } }
-fragment TripMoneyDisplay on MoneyDisplay { amount currency displayString }
-fragment SearchResultScore on MatchingResult {
-  alternateDates alternateLocation lessBedrooms lessWorkstations lessBeds lessHomeCapacity noPetsAllowed needPetsFriendlyHomeOtherSide score
-}
-fragment SearchHousehold on BaseHouseholdProfile {
-  id
-  primaryResident { displayName image { url(width: $avatarWidth) } }
-  householdImages { url(width: $avatarWidth) }
-}
 """
 
+QUERY_EXPLORE_LIST = """
+query exploreList($filter: FlexibleSearchFilter!, $pagination: Pagination!, $sortedAt: Date!) {
+  getHomesWithSearchCriteria(filter: $filter, pagination: $pagination, sortedAt: $sortedAt) """ + EXPLORE_LIST_SELECTION + """
+}
+""" + EXPLORE_LIST_FRAGMENTS
+
+# Number of exploreList queries merged into one aliased GraphQL request
+KINDRED_BATCH_SIZE = int(os.environ.get('KINDRED_BATCH_SIZE', 8))
+
+# Tokens that recently passed /api/auth/validate, keyed by SHA-256 so raw tokens are not held
+VALIDATE_CACHE_TTL_SECONDS = int(os.environ.get('VALIDATE_CACHE_TTL_SECONDS', 300))
+validated_tokens = TTLCache(maxsize=10_000, ttl=VALIDATE_CACHE_TTL_SECONDS)
+_validated_tokens_lock = threading.Lock()
+
+
+def _format_errors(errors) -> str:
+    """Pretty-print GraphQL errors for exception messages."""
+    return orjson.dumps(errors, option=orjson.OPT_INDENT_2).decode()
+
 
 def gql_noauth(operation_name: str, query: str, variables: dict):
     """Send a GraphQL request without Authorization (for login)."""
@@ -192,11 +244,11 @@ def gql_noauth(operation_name: str, query: str, variables: dict):
         "x-locale": "en",
     }
     payload = {"operationName": operation_name, "query": query, "variables": variables}
-    r = requests.post(KINDRED_URL, headers=headers, data=json.dumps(payload))
+    r = kindred_session.post(KINDRED_URL, headers=headers, data=orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY))
     r.raise_for_status()
-    j = r.json()
+    j = orjson.loads(r.content)
     if "errors" in j:
-        raise RuntimeError(json.dumps(j["errors"], indent=2))
+        raise RuntimeError(_format_errors(j["errors"]))
     return j["data"]
 
 
@@ -204,11 +256,12 @@ def post_graphql(operation_name: str, query: str, variables: dict, token: Option
     """Posts a GraphQL query/mutation with authentication."""
     payload = {"operationName": operation_name, "query": query, "variables": variables or {}}
     
-    r = requests.post(KINDRED_URL, headers=_build_headers(token), data=json.dumps(payload))
+    kindred_limiter.acquire()
+    r = kindred_session.post(KINDRED_URL, headers=_build_headers(token), data=orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY))
     
     def parse(resp):
         try:
-            d = resp.json()
+            d = orjson.loads(resp.content)
         except ValueError:
             return None, None
         return d, d.get("errors")
@@ -217,50 +270,276 @@ def post_graphql(operation_name: str, query: str, variables: dict, token: Option
     
     if r.status_code >= 400:
         if errs:
-            raise RuntimeError(json.dumps(errs, indent=2))
+            raise RuntimeError(_format_errors(errs))
         r.raise_for_status()
     
     if errs:
-        raise RuntimeError(json.dumps(errs, indent=2))
+        raise RuntimeError(_format_errors(errs))
     
     return data["data"]
 
 
-def get_driving_time(resort_lat, resort_lon, house_lat, house_lon):
-    """Get driving time between two points using OpenRouteService."""
-    if not OPENROUTESERVICE_API_KEY:
-        return None
+@functools.lru_cache(maxsize=None)
+def _build_batched_explore_query(count: int) -> str:
+    """Build an exploreList query with `count` aliased getHomesWithSearchCriteria selections."""
+    var_defs = []
+    selections = []
+    for i in range(count):
+        var_defs.append(f"$filter{i}: FlexibleSearchFilter!, $pagination{i}: Pagination!, $sortedAt{i}: Date!")
+        selections.append(
+            f"  explore{i}: getHomesWithSearchCriteria(filter: $filter{i}, pagination: $pagination{i}, sortedAt: $sortedAt{i}) "
+            + EXPLORE_LIST_SELECTION
+        )
+    return (
+        f"query exploreListBatch({', '.join(var_defs)}) {{\n"
+        + "\n".join(selections)
+        + "\n}\n"
+        + EXPLORE_LIST_FRAGMENTS
+    )
+
+
+def _token_hash(token: Optional[str] = None) -> str:
+    """SHA-256 of the effective access token, for cache keys that must not hold raw tokens."""
+    return hashlib.sha256((token or token_box.access or '').encode()).hexdigest()
+
+
+def batch_explore_list(variables_list: List[dict], token: Optional[str] = None) -> List[dict]:
+    """
+    Run several exploreList queries in a single HTTP request using aliased root fields.
+    Queries that come back null in an otherwise successful response are retried on their own;
+    if the whole request fails, the error is raised.
+    """
+    if len(variables_list) == 1:
+        data = post_graphql("exploreList", QUERY_EXPLORE_LIST, variables_list[0], token=token)
+        return [data["getHomesWithSearchCriteria"]]
+    
+    variables = {}
+    for i, vars_page in enumerate(variables_list):
+        variables[f"filter{i}"] = vars_page["filter"]
+        variables[f"pagination{i}"] = vars_page["pagination"]
+        variables[f"sortedAt{i}"] = vars_page["sortedAt"]
+    payload = {
+        "operationName": "exploreListBatch",
+        "query": _build_batched_explore_query(len(variables_list)),
+        "variables": variables
+    }
+    
+    kindred_limiter.acquire()
+    r = kindred_session.post(KINDRED_URL, headers=_build_headers(token), data=orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY))
+    try:
+        body = orjson.loads(r.content)
+    except ValueError:
+        body = {}
+    errs = body.get("errors")
+    
+    # A failed request (e.g. rate limited) is raised rather than re-sent query by query
+    if r.status_code >= 400:
+        if errs:
+            raise RuntimeError(_format_errors(errs))
+        r.raise_for_status()
+    
+    data = body.get("data")
+    if data is None:
+        raise RuntimeError(_format_errors(errs) if errs else "Batched exploreList returned no data")
     
+    results = []
+    for i, vars_page in enumerate(variables_list):
+        res = data.get(f"explore{i}")
+        if res is None:
+            res = post_graphql("exploreList", QUERY_EXPLORE_LIST, vars_page, token=token)["getHomesWithSearchCriteria"]
+        results.append(res)
+    return results
+
+
+# Persistent SQLite cache shared across processes and restarts: OpenRouteService
+# driving times and per-resort search results. It is only an optimization, so read and
+# write errors (e.g. the file is locked by another worker) are logged and never fail a request
+CACHE_DB_PATH = os.environ.get('CACHE_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache.sqlite3'))
+SEARCH_CACHE_TTL_SECONDS = int(os.environ.get('SEARCH_CACHE_TTL_SECONDS', 900))
+_cache_db = sqlite3.connect(CACHE_DB_PATH, check_same_thread=False)
+# WAL lets other worker processes read while one of them writes
+_cache_db.execute("PRAGMA journal_mode=WAL")
+_cache_db.executescript("""
+CREATE TABLE IF NOT EXISTS ors_cache (
+  rlat REAL, rlon REAL, hlat REAL, hlon REAL,
+  minutes REAL, ts INTEGER,
+  PRIMARY KEY (rlat, rlon, hlat, hlon)
+);
+CREATE TABLE IF NOT EXISTS search_cache (
+  resort TEXT, params_hash TEXT,
+  ts INTEGER, payload BLOB,
+  PRIMARY KEY (resort, params_hash)
+);
+""")
+_cache_db.commit()
+_cache_db_lock = threading.Lock()
+
+# Driving-time lookups run on their own pool with one keep-alive session;
+# 429/503 responses are retried with backoff. ORS quotas are per minute, so the
+# bucket holds a full minute's worth and a burst of lookups need not be spread out
+ors_limiter = _RateLimiter(ORS_MAX_QPS, capacity=max(ORS_MAX_QPS * 60, 1.0))
+ors_executor = ThreadPoolExecutor(max_workers=ORS_MAX_WORKERS, thread_name_prefix='ors')
+ors_session = requests.Session()
+ors_session.mount('https://', HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 503], allowed_methods=frozenset(['POST']))
+))
+
+
+# Most homes per ORS matrix request (the resort is the remaining location)
+ORS_MATRIX_MAX_HOMES = 49
+ORS_HEADERS = {
+    'Accept': 'application/json, application/geo+json, application/gpx+xml, img/png; charset=utf-8',
+    'api_key': OPENROUTESERVICE_API_KEY,
+    'Content-Type': 'application/json; charset=utf-8'
+}
+
+# In-process layer over the SQLite cache, guarded by _cache_db_lock
+ors_memory_cache = LRUCache(maxsize=100_000)
+
+
+def _fetch_driving_time(resort_lat, resort_lon, house_lat, house_lon):
+    """Request driving time in minutes from OpenRouteService. Raises on any failure."""
     coordinates = {"coordinates": [[house_lon, house_lat], [resort_lon, resort_lat]]}
     directions_url = f'https://api.openrouteservice.org/v2/directions/driving-car?api_key={OPENROUTESERVICE_API_KEY}'
-    headers = {
-        'Accept': 'application/json, application/geo+json, application/gpx+xml, img/png; charset=utf-8',
-        'api_key': OPENROUTESERVICE_API_KEY,
-        'Content-Type': 'application/json; charset=utf-8'
+    
+    ors_limiter.acquire()
+    call = ors_session.post(directions_url, data=orjson.dumps(coordinates, option=orjson.OPT_SERIALIZE_NUMPY), headers=ORS_HEADERS)
+    return orjson.loads(call.content)['routes'][0]['summary']['duration'] / 60
+
+
+class _TruncatedMatrixError(Exception):
+    """Raised when an ORS matrix response has fewer rows than requested homes."""
+
+
+def _fetch_driving_times_matrix(resort, houses):
+    """
+    Request driving times in minutes from each (lat, lon) house to the resort with one
+    ORS matrix call. Unroutable homes come back as None. Raises _TruncatedMatrixError if
+    the response does not cover every house, and other exceptions on any other failure.
+    """
+    body = {
+        "locations": [[resort[1], resort[0]]] + [[house_lon, house_lat] for house_lat, house_lon in houses],
+        "sources": list(range(1, len(houses) + 1)),
+        "destinations": [0],
+        "metrics": ["duration"]
     }
+    matrix_url = f'https://api.openrouteservice.org/v2/matrix/driving-car?api_key={OPENROUTESERVICE_API_KEY}'
     
-    try:
-        call = requests.post(directions_url, json=coordinates, headers=headers)
-        return call.json()['routes'][0]['summary']['duration'] / 60
-    except (KeyError, Exception):
-        return None
+    ors_limiter.acquire()
+    call = ors_session.post(matrix_url, data=orjson.dumps(body, option=orjson.OPT_SERIALIZE_NUMPY), headers=ORS_HEADERS)
+    call.raise_for_status()
+    durations = orjson.loads(call.content)['durations']
+    if len(durations) != len(houses):
+        raise _TruncatedMatrixError(f"ORS matrix returned {len(durations)} rows for {len(houses)} homes")
+    return [row[0] / 60 if row and row[0] is not None else None for row in durations]
+
+
+def _cached_driving_times(keys):
+    """Look up rounded (rlat, rlon, hlat, hlon) keys in memory, then SQLite. Returns {key: minutes} for hits."""
+    found = {}
+    with _cache_db_lock:
+        try:
+            for key in keys:
+                minutes = ors_memory_cache.get(key)
+                if minutes is None:
+                    row = _cache_db.execute(
+                        "SELECT minutes FROM ors_cache WHERE rlat = ? AND rlon = ? AND hlat = ? AND hlon = ?", key
+                    ).fetchone()
+                    if row is None:
+                        continue
+                    minutes = ors_memory_cache[key] = row[0]
+                found[key] = minutes
+        except sqlite3.Error as e:
+            # Keys not reached yet are simply fetched from ORS
+            print(f"Could not read cached driving times: {e}")
+    return found
+
+
+def _store_driving_times(minutes_by_key):
+    """Write fetched driving times to the memory and SQLite caches."""
+    ts = int(time.time())
+    with _cache_db_lock:
+        ors_memory_cache.update(minutes_by_key)
+        try:
+            _cache_db.executemany(
+                "INSERT OR REPLACE INTO ors_cache VALUES (?, ?, ?, ?, ?, ?)",
+                [(*key, minutes, ts) for key, minutes in minutes_by_key.items()]
+            )
+            _cache_db.commit()
+        except sqlite3.Error as e:
+            print(f"Could not cache driving times: {e}")
+
+
+def get_driving_times(resort_lat, resort_lon, houses):
+    """
+    Get driving times in minutes from each (lat, lon) house to one resort, using the caches
+    and ORS matrix requests. None where no time is available.
+    """
+    if not OPENROUTESERVICE_API_KEY:
+        return [None] * len(houses)
+    
+    # Round to ~10 m so nearby lookups share a cache entry
+    resort = (round(float(resort_lat), 4), round(float(resort_lon), 4))
+    keys = [resort + (round(float(house_lat), 4), round(float(house_lon), 4)) for house_lat, house_lon in houses]
+    cached = _cached_driving_times(set(keys))
+    misses = list(dict.fromkeys(key for key in keys if key not in cached))
+    
+    fetched = {}
+    for i in range(0, len(misses), ORS_MATRIX_MAX_HOMES):
+        chunk = misses[i:i + ORS_MATRIX_MAX_HOMES]
+        try:
+            minutes_list = _fetch_driving_times_matrix(resort, [key[2:] for key in chunk])
+        except _TruncatedMatrixError as e:
+            print(f"{e}, falling back to {len(chunk)} directions requests")
+            minutes_list = []
+            for key in chunk:
+                try:
+                    minutes_list.append(_fetch_driving_time(*key))
+                except Exception:
+                    minutes_list.append(None)
+        except Exception as e:
+            print(f"ORS matrix request failed: {e}")
+            continue
+        fetched.update((key, minutes) for key, minutes in zip(chunk, minutes_list) if minutes is not None)
+    
+    if fetched:
+        _store_driving_times(fetched)
+    return [cached.get(key, fetched.get(key)) for key in keys]
+
+
+def get_driving_time(resort_lat, resort_lon, house_lat, house_lon):
+    """Get driving time between two points using OpenRouteService."""
+    return get_driving_times(resort_lat, resort_lon, [(house_lat, house_lon)])[0]
+
+
+def haversine_miles(lat1, lon1, lat2, lon2):
+    """Great-circle distance in miles. Works element-wise on NumPy arrays."""
+    lat1, lon1, lat2, lon2 = (np.radians(a) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(a))
+
+
+# Octagon vertex directions for make_polygon, as unit sin/cos components
+POLYGON_DIRECTIONS_DEG = np.array([90, 45, 0, 315, 270, 225, 180, 135])
+POLYGON_SIN = np.sin(np.radians(POLYGON_DIRECTIONS_DEG))
+POLYGON_COS = np.cos(np.radians(POLYGON_DIRECTIONS_DEG))
+
+
+@functools.lru_cache(maxsize=1024)
+def _polygon_points(lat, lon, distance_miles):
+    """Octagon vertices around a point as a tuple of (lat, lon) pairs."""
+    miles_per_lat = 69.0
+    miles_per_lon = 69.172 * math.cos(math.radians(lat))
+    lats = lat + distance_miles * POLYGON_SIN / miles_per_lat
+    lons = lon + distance_miles * POLYGON_COS / miles_per_lon
+    return tuple(zip(lats.tolist(), lons.tolist()))
 
 
 def make_polygon(lat, lon, distance_miles):
     """Creates an octagonal polygon around a point."""
-    lat_rad = math.radians(lat)
-    miles_per_lat = 69.0
-    miles_per_lon = 69.172 * math.cos(lat_rad)
-    
-    directions_deg = [90, 45, 0, 315, 270, 225, 180, 135]
-    polygon = []
-    for angle in directions_deg:
-        angle_rad = math.radians(angle)
-        d_lat = (distance_miles * math.sin(angle_rad)) / miles_per_lat
-        d_lon = (distance_miles * math.cos(angle_rad)) / miles_per_lon
-        point = {"lat": lat + d_lat, "lon": lon + d_lon}
-        polygon.append(point)
-    return polygon
+    return [{"lat": p_lat, "lon": p_lon} for p_lat, p_lon in _polygon_points(float(lat), float(lon), float(distance_miles))]
 
 
 def to_iso_date_range(start_date, end_date):
@@ -330,92 +609,186 @@ def explore_map_once(polygon, date_range, date_type='flexible', min_nights=0, pa
             }
         },
         "pagination": {"page": page, "pageSize": page_size},
-        "sortedAt": datetime.datetime.now(datetime.UTC).isoformat().replace("+00:00", "Z"),
-        "width": 720,
-        "avatarWidth": 90
+        "sortedAt": datetime.datetime.now(datetime.UTC).isoformat().replace("+00:00", "Z")
     }
     return variables
 
 
-def explore_map_multiple(lat, lon, distance_miles, date_range, date_type, min_nights=0, page_size=50, token=None, total_guests=0, pets_allowed=False):
-    """Search for homes near a location."""
+def _parse_home_recs(res: dict, pets_allowed: bool = False) -> List[dict]:
+    """Flatten the homeRecs of one exploreList page into result rows."""
+    rows = []
+    for rec in res.get("homeRecs", []):
+        h = rec["home"]
+        pet_preference = h.get("petPreference")
+        pet_hosting_details = h.get("petHostingDetails")
+        
+        # If pets filter is enabled, skip homes that don't allow pets
+        # Check both petPreference and petHostingDetails fields
+        if pets_allowed and (pet_preference == "NO" or pet_hosting_details == "NO"):
+            continue
+        
+        # Get first image URL or None
+        media = h.get("media", [])
+        image_url = media[0].get("thumbnailUrl") if media and len(media) > 0 else None
+        
+        rows.append({
+            "id": h.get("id"),
+            "homeId": h.get("id"),
+            "title": h.get("title"),
+            "destination": (h.get("destination") or {}).get("name"),
+            "lat": h.get("lat"),
+            "lon": h.get("lon"),
+            "availabilitiesWithoutBookedDates": h.get("availabilitiesWithoutBookedDates", []),
+            "maxGuestsLimit": h.get("maxGuestsLimit"),
+            "petPreference": pet_preference,
+            "petHostingDetails": pet_hosting_details,
+            "bedroomsCount": h.get("bedroomsCount"),
+            "bathrooms": h.get("bathrooms"),
+            "imageUrl": image_url,
+        })
+    return rows
+
+
+def explore_map_batch(coords, distance_miles, date_range, date_type, min_nights=0, page_size=50, token=None, total_guests=0, pets_allowed=False):
+    """
+    Search for homes near several (lat, lon) locations, paging through them together.
+    Each round sends one batched request covering every location that still has more pages.
+    Returns one list of homes per location, in the same order as coords.
+    """
     sorted_at = datetime.datetime.now(datetime.UTC).isoformat(timespec='milliseconds').replace("+00:00", "Z")
-    all_rows = []
-    page = 0
-    
-    polygon = make_polygon(lat, lon, distance_miles)
+    all_rows = [[] for _ in coords]
+    polygons = [make_polygon(lat, lon, distance_miles) for lat, lon in coords]
     
     if date_type == 'flexible':
         formatted_date_range = make_monthly_date_ranges(date_range[0], date_range[1])
     else:
         formatted_date_range = [to_iso_date_range(date_range[0], date_range[1])]
     
-    while True:
-        vars_page = explore_map_once(
-            polygon,
-            formatted_date_range,
-            date_type=date_type,
-            min_nights=min_nights,
-            page=page,
-            page_size=page_size,
-            total_guests=total_guests,
-            pets_allowed=pets_allowed
-        )
-        
-        vars_page["sortedAt"] = sorted_at
-        
-        data = post_graphql("exploreList", QUERY_EXPLORE_LIST, vars_page, token=token)
-        res = data["getHomesWithSearchCriteria"]
-        
-        for rec in res.get("homeRecs", []):
-            h = rec["home"]
-            pet_preference = h.get("petPreference")
-            pet_hosting_details = h.get("petHostingDetails")
-            
-            # If pets filter is enabled, skip homes that don't allow pets
-            # Check both petPreference and petHostingDetails fields
-            if pets_allowed and (pet_preference == "NO" or pet_hosting_details == "NO"):
-                continue
-            
-            # Get first image URL or None
-            media = h.get("media", [])
-            image_url = media[0].get("thumbnailUrl") if media and len(media) > 0 else None
-            
-            all_rows.append({
-                "id": h.get("id"),
-                "homeId": h.get("id"),
-                "title": h.get("title"),
-                "destination": (h.get("destination") or {}).get("name"),
-                "lat": h.get("lat"),
-                "lon": h.get("lon"),
-                "availabilitiesWithoutBookedDates": h.get("availabilitiesWithoutBookedDates", []),
-                "maxGuestsLimit": h.get("maxGuestsLimit"),
-                "petPreference": pet_preference,
-                "petHostingDetails": pet_hosting_details,
-                "bedroomsCount": h.get("bedroomsCount"),
-                "bathrooms": h.get("bathrooms"),
-                "imageUrl": image_url,
-            })
-        
-        if not res.get("hasMore"):
-            break
-        
+    def fetch_page(page, indices):
+        variables_list = []
+        for i in indices:
+            vars_page = explore_map_once(
+                polygons[i],
+                formatted_date_range,
+                date_type=date_type,
+                min_nights=min_nights,
+                page=page,
+                page_size=page_size,
+                total_guests=total_guests,
+                pets_allowed=pets_allowed
+            )
+            vars_page["sortedAt"] = sorted_at
+            variables_list.append(vars_page)
+        return batch_explore_list(variables_list, token=token)
+    
+    pending = list(range(len(coords)))
+    page = 0
+    while pending:
+        responses = fetch_page(page, pending)
+        for i, res in zip(pending, responses):
+            all_rows[i].extend(_parse_home_recs(res, pets_allowed))
+        pending = [i for i, res in zip(pending, responses) if res.get("hasMore")]
         page += 1
-        time.sleep(0.4)
     
     return all_rows
 
 
+def explore_map_multiple(lat, lon, distance_miles, date_range, date_type, min_nights=0, page_size=50, token=None, total_guests=0, pets_allowed=False):
+    """Search for homes near a location."""
+    return explore_map_batch(
+        [(lat, lon)],
+        distance_miles=distance_miles,
+        date_range=date_range,
+        date_type=date_type,
+        min_nights=min_nights,
+        page_size=page_size,
+        token=token,
+        total_guests=total_guests,
+        pets_allowed=pets_allowed
+    )[0]
+
+
+def _search_params_hash(token, date_range, date_type, mile_range, page_size, min_nights, total_guests, pets_allowed) -> str:
+    """
+    Hash of the user and search parameters that determine a resort's results.
+    The token hash is included because swap matches depend on the caller's own home,
+    and so a request only reads rows cached for the same token.
+    """
+    params = {
+        "token": _token_hash(token),
+        "date_range": list(date_range),
+        "date_type": date_type,
+        "mile_range": mile_range,
+        "page_size": page_size,
+        "min_nights": min_nights,
+        "total_guests": total_guests,
+        "pets_allowed": pets_allowed
+    }
+    return hashlib.sha256(orjson.dumps(params, option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY)).hexdigest()
+
+
+def _load_cached_searches(resorts: List[str], params_hash: str) -> Dict[int, List[dict]]:
+    """Return {index: homes} for resorts with results cached in the last SEARCH_CACHE_TTL_SECONDS."""
+    cutoff = int(time.time()) - SEARCH_CACHE_TTL_SECONDS
+    found = {}
+    with _cache_db_lock:
+        try:
+            for i, resort in enumerate(resorts):
+                row = _cache_db.execute(
+                    "SELECT payload FROM search_cache WHERE resort = ? AND params_hash = ? AND ts >= ?",
+                    (resort, params_hash, cutoff)
+                ).fetchone()
+                if row is not None:
+                    found[i] = orjson.loads(row[0])
+        except sqlite3.Error as e:
+            # Resorts not reached yet are simply searched again
+            print(f"Could not read cached searches: {e}")
+    return found
+
+
+def _store_searches(resorts: List[str], results_per_resort: List[List[dict]], params_hash: str):
+    """Save each resort's homes for later searches with the same parameters, dropping expired rows."""
+    now = int(time.time())
+    try:
+        with _cache_db_lock:
+            _cache_db.executemany(
+                "INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?, ?)",
+                [(resort, params_hash, now, orjson.dumps(results)) for resort, results in zip(resorts, results_per_resort)]
+            )
+            _cache_db.execute("DELETE FROM search_cache WHERE ts < ?", (now - SEARCH_CACHE_TTL_SECONDS,))
+            _cache_db.commit()
+    except sqlite3.Error as e:
+        print(f"Could not cache search results: {e}")
+
+
+def _submit_driving_times(row, results, mile_range):
+    """
+    Start the driving-time lookup for one resort's search results.
+    Returns a (future, index) pair per home with an id, in order, or None where the lookup is skipped.
+    """
+    houses = np.array(
+        [(home.get('lat'), home.get('lon')) for home in results if home.get('id')], dtype=float
+    ).reshape(-1, 2)
+    
+    # Only homes within driving range as the crow flies (and with coordinates) get a
+    # lookup; the rest keep driving_time_minutes = None
+    crow_miles = haversine_miles(row['latitude'], row['longitude'], houses[:, 0], houses[:, 1])
+    in_range = np.flatnonzero(crow_miles <= ORS_PREFILTER_FACTOR * mile_range)
+    
+    lookups = [None] * len(houses)
+    if len(in_range):
+        future = ors_executor.submit(get_driving_times, row['latitude'], row['longitude'], houses[in_range].tolist())
+        for j, i in enumerate(in_range):
+            lookups[i] = (future, j)
+    return lookups
+
+
 def resort_map_multiple(resort_df, date_range, date_type='flexible', mile_range=35, page_size=50, min_nights=0, token=None, total_guests=0, pets_allowed=False):
     """Search for homes near multiple resorts."""
-    results_full = []
-    
-    for idx, row in resort_df.iterrows():
-        current_time = datetime.datetime.now()
-        
-        results = explore_map_multiple(
-            lat=row['latitude'],
-            lon=row['longitude'],
+    def search_batch(batch_rows):
+        start_time = datetime.datetime.now()
+        batch_results = explore_map_batch(
+            [(row['latitude'], row['longitude']) for row in batch_rows],
             distance_miles=mile_range,
             date_range=date_range,
             date_type=date_type,
@@ -425,58 +798,61 @@ def resort_map_multiple(resort_df, date_range, date_type='flexible', mile_range=
             total_guests=total_guests,
             pets_allowed=pets_allowed
         )
-        
-        for result in results:
-            result['resort'] = row['resort']
-            result['state'] = None if pd.isna(row['state']) else row['state']
-            result['region'] = row['region']
-            result['resort_lat'] = row['latitude']
-            result['resort_lon'] = row['longitude']
-            results_full.append(result)
-        
-        time_elapsed = datetime.datetime.now() - current_time
-        print(f"Found {len(results)} houses near {row.get('resort', idx)} in {time_elapsed}")
-    
-    # Add driving times
-    for result in results_full:
-        if result.get('lat') and result.get('lon'):
-            result['driving_time_minutes'] = get_driving_time(
-                result['resort_lat'], result['resort_lon'],
-                result['lat'], result['lon']
-            )
-        else:
-            result['driving_time_minutes'] = None
+        time_elapsed = datetime.datetime.now() - start_time
+        for row, results in zip(batch_rows, batch_results):
+            print(f"Found {len(results)} houses near {row['resort']} in {time_elapsed}")
+        _store_searches([row['resort'] for row in batch_rows], batch_results, params_hash)
+        return batch_results
+    
+    rows = _records(resort_df, ['resort', 'state', 'region', 'latitude', 'longitude'])
+    results_by_row = [None] * len(rows)
+    lookups_by_row = [None] * len(rows)
+    
+    # Resorts this user searched recently with the same parameters are served from the cache
+    params_hash = _search_params_hash(token, date_range, date_type, mile_range, page_size, min_nights, total_guests, pets_allowed)
+    for i, results in _load_cached_searches([row['resort'] for row in rows], params_hash).items():
+        print(f"Using cached results for {rows[i]['resort']}")
+        results_by_row[i] = results
+        lookups_by_row[i] = _submit_driving_times(rows[i], results, mile_range)
     
-    # Deduplicate homes by ID and aggregate resort information
+    # Fan out batches of the remaining resorts; each batch pages through Kindred with one
+    # request per round. Driving-time lookups for a batch start as soon as it finishes,
+    # overlapping with the Kindred searches still in flight.
+    misses = [i for i, results in enumerate(results_by_row) if results is None]
+    batches = [misses[i:i + KINDRED_BATCH_SIZE] for i in range(0, len(misses), KINDRED_BATCH_SIZE)]
+    futures = {search_executor.submit(search_batch, [rows[i] for i in batch]): batch for batch in batches}
+    for future in as_completed(futures):
+        for i, results in zip(futures[future], future.result()):
+            results_by_row[i] = results
+            lookups_by_row[i] = _submit_driving_times(rows[i], results, mile_range)
+    
+    # Deduplicate homes by ID as results are merged (in resort order, so output
+    # does not depend on completion order); each home keeps one entry per resort
     homes_dict = {}
-    for result in results_full:
-        home_id = result.get('id')
-        if not home_id:
-            continue
+    for row, results, lookups in zip(rows, results_by_row, lookups_by_row):
+        lookups = iter(lookups)
+        for home in results:
+            home_id = home.get('id')
+            if not home_id:
+                continue
             
-        if home_id not in homes_dict:
-            # First time seeing this home
-            homes_dict[home_id] = result.copy()
-            homes_dict[home_id]['resorts'] = [{
-                'resort': result['resort'],
-                'state': result.get('state'),
-                'region': result['region'],
-                'driving_time_minutes': result['driving_time_minutes']
-            }]
-            homes_dict[home_id]['min_driving_time'] = result['driving_time_minutes']
-        else:
-            # Home already exists, add this resort to its list
-            homes_dict[home_id]['resorts'].append({
-                'resort': result['resort'],
-                'state': result.get('state'),
-                'region': result['region'],
-                'driving_time_minutes': result['driving_time_minutes']
+            merged = homes_dict.get(home_id)
+            if merged is None:
+                # First time seeing this home
+                merged = homes_dict[home_id] = home
+                merged['resorts'] = []
+                merged['min_driving_time'] = None
+            
+            lookup = next(lookups)
+            minutes = lookup[0].result()[lookup[1]] if lookup is not None else None
+            merged['resorts'].append({
+                'resort': row['resort'],
+                'state': row['state'],
+                'region': row['region'],
+                'driving_time_minutes': minutes
             })
-            # Update minimum driving time if this one is shorter
-            if result['driving_time_minutes'] is not None:
-                current_min = homes_dict[home_id]['min_driving_time']
-                if current_min is None or result['driving_time_minutes'] < current_min:
-                    homes_dict[home_id]['min_driving_time'] = result['driving_time_minutes']
+            if minutes is not None and (merged['min_driving_time'] is None or minutes < merged['min_driving_time']):
+                merged['min_driving_time'] = minutes
     
     # Convert back to list and sort by minimum driving time
     deduplicated_results = list(homes_dict.values())
@@ -548,6 +924,10 @@ def verify_otp():
         # Update the token box with the new access token
         token_box.access = access_token
         
+        # A freshly issued token is known to be valid
+        with _validated_tokens_lock:
+            validated_tokens[_token_hash(access_token)] = True
+        
         return jsonify({
             "success": True,
             "accessToken": access_token,
@@ -570,6 +950,13 @@ def validate_token():
         
         print(f"Validating token: {token[:20]}...")
         
+        # Tokens confirmed recently skip the round-trip to Kindred
+        token_hash = _token_hash(token)
+        with _validated_tokens_lock:
+            if token_hash in validated_tokens:
+                print("Token is valid (cached)")
+                return jsonify({"valid": True})
+        
         # Make a simple, fast GraphQL query to check if token is valid
         QUERY_ME = """
         query {
@@ -586,6 +973,8 @@ def validate_token():
         
         if result and result.get("me"):
             print("Token is valid")
+            with _validated_tokens_lock:
+                validated_tokens[token_hash] = True
             return jsonify({"valid": True})
         else:
             print("Token validation returned no 'me' data")
@@ -602,53 +991,13 @@ def validate_token():
 @app.route('/api/resorts', methods=['GET'])
 def get_resorts():
     """Get list of all resorts."""
-    try:
-        # Get unique regions
-        regions = sorted(locations['region'].dropna().unique().tolist())
-        
-        # Get all resorts with their details
-        # Use .where() to convert NaN to None (which becomes null in JSON)
-        resorts_df = locations[['resort', 'region', 'state', 'latitude', 'longitude']].copy()
-        resorts_df = resorts_df.where(pd.notna(resorts_df), None)
-        resorts = resorts_df.to_dict('records')
-        
-        print(f"Returning {len(regions)} regions and {len(resorts)} resorts")
-        
-        return jsonify({
-            "regions": regions,
-            "resorts": resorts
-        })
-    
-    except Exception as e:
-        print(f"Error in get_resorts: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    return Response(RESORTS_JSON, mimetype='application/json')
 
 
 @app.route('/api/resorts/stats', methods=['GET'])
 def get_resort_stats():
     """Get all resort statistics for visualization."""
-    try:
-        # Get all columns we need for the visualization
-        stats_df = locations[['resort', 'region', 'state', 'skiable_acres', 'vertical_drop', 'annual_snowfall']].copy()
-        
-        # Convert NaN to None for JSON serialization
-        stats_df = stats_df.where(pd.notna(stats_df), None)
-        
-        resorts = stats_df.to_dict('records')
-        
-        # Get unique regions for filtering
-        regions = sorted(locations['region'].dropna().unique().tolist())
-        
-        print(f"Returning stats for {len(resorts)} resorts across {len(regions)} regions")
-        
-        return jsonify({
-            "resorts": resorts,
-            "regions": regions
-        })
-    
-    except Exception as e:
-        print(f"Error in get_resort_stats: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    return Response(RESORT_STATS_JSON, mimetype='application/json')
 
 
 @app.route('/api/search', methods=['POST'])
@@ -684,31 +1033,33 @@ def search():
         if not start_date or not end_date:
             return jsonify({"error": "Start date and end date are required"}), 400
         
-        # Filter resorts based on criteria
-        resort_df = locations.copy()
+        # Filter resorts based on criteria with a single combined mask
+        mask = np.ones(len(locations), dtype=bool)
         
         # Apply region filter if specific regions are selected
         if regions and len(regions) > 0:
-            resort_df = resort_df[resort_df['region'].isin(regions)]
-            print(f"Filtered to {len(resort_df)} resorts in regions: {regions}")
+            mask &= locations['region'].isin(regions).to_numpy()
+            print(f"Filtered to {mask.sum()} resorts in regions: {regions}")
         
         # Apply resort filter if specific resorts are selected
         if resorts and len(resorts) > 0:
-            resort_df = resort_df[resort_df['resort'].isin(resorts)]
-            print(f"Filtered to {len(resort_df)} specific resorts: {resorts}")
+            mask &= locations['resort'].isin(resorts).to_numpy()
+            print(f"Filtered to {mask.sum()} specific resorts: {resorts}")
         
         # Apply advanced filters
         if min_skiable_acres is not None and min_skiable_acres > 0:
-            resort_df = resort_df[resort_df['skiable_acres'] >= min_skiable_acres]
-            print(f"Filtered to {len(resort_df)} resorts with >= {min_skiable_acres} skiable acres")
+            mask &= RESORT_FILTER_ARRAYS['skiable_acres'] >= min_skiable_acres
+            print(f"Filtered to {mask.sum()} resorts with >= {min_skiable_acres} skiable acres")
         
         if min_vertical_drop is not None and min_vertical_drop > 0:
-            resort_df = resort_df[resort_df['vertical_drop'] >= min_vertical_drop]
-            print(f"Filtered to {len(resort_df)} resorts with >= {min_vertical_drop} ft vertical drop")
+            mask &= RESORT_FILTER_ARRAYS['vertical_drop'] >= min_vertical_drop
+            print(f"Filtered to {mask.sum()} resorts with >= {min_vertical_drop} ft vertical drop")
         
         if min_annual_snowfall is not None and min_annual_snowfall > 0:
-            resort_df = resort_df[resort_df['annual_snowfall'] >= min_annual_snowfall]
-            print(f"Filtered to {len(resort_df)} resorts with >= {min_annual_snowfall} in annual snowfall")
+            mask &= RESORT_FILTER_ARRAYS['annual_snowfall'] >= min_annual_snowfall
+            print(f"Filtered to {mask.sum()} resorts with >= {min_annual_snowfall} in annual snowfall")
+        
+        resort_df = locations.loc[mask]
         
         if resort_df.empty:
             print("No resorts match the filter criteria")
@@ -732,37 +1083,42 @@ def search():
         search_start = datetime.datetime.strptime(start_date, "%Y-%m-%d")
         search_end = datetime.datetime.strptime(end_date, "%Y-%m-%d")
 
-        for r in results:
-            availabilities = r.get("availabilitiesWithoutBookedDates", [])
-
-            # Filter availabilities to only those that overlap with search dates
-            matching_availabilities = []
-            for avail in availabilities:
-                avail_start = datetime.datetime.strptime(avail["startDate"], "%Y-%m-%d")
-                avail_end = datetime.datetime.strptime(avail["endDate"], "%Y-%m-%d")
+        # Flatten every home's availabilities so the date overlap is checked in one pass
+        flat_avails = [
+            (home_idx, avail)
+            for home_idx, r in enumerate(results)
+            for avail in r.get("availabilitiesWithoutBookedDates") or []
+        ]
+        avail_starts = pd.to_datetime(
+            pd.Series([avail["startDate"] for _, avail in flat_avails], dtype=object), format="%Y-%m-%d", cache=True
+        )
+        avail_ends = pd.to_datetime(
+            pd.Series([avail["endDate"] for _, avail in flat_avails], dtype=object), format="%Y-%m-%d", cache=True
+        )
+        
+        # Keep availabilities that overlap with the search dates, grouped back by home
+        overlaps = ((avail_starts <= search_end) & (avail_ends >= search_start)).to_numpy()
+        matching_by_home = {}
+        for i in np.flatnonzero(overlaps):
+            home_idx, avail = flat_avails[i]
+            matching_by_home.setdefault(home_idx, []).append(avail)
 
-                # Check if there's any overlap between availability and search dates
-                if avail_start <= search_end and avail_end >= search_start:
-                    matching_availabilities.append(avail)
+        for home_idx, r in enumerate(results):
+            matching_availabilities = matching_by_home.get(home_idx, [])
 
             # Only include homes that have at least one matching availability period
             if len(matching_availabilities) > 0:
-                # Format resorts array with drive times
+                # Resorts are sorted by drive time, so the first one is the closest
                 resorts_list = r.get("resorts", [])
-                if not resorts_list:
-                    # Fallback for single resort (backward compatibility)
-                    resorts_list = [{
-                        'resort': r.get("resort"),
-                        'driving_time_minutes': r.get("driving_time_minutes")
-                    }]
+                closest = resorts_list[0] if resorts_list else {}
                 
                 formatted_results.append({
                     "id": r.get("homeId"),
                     "name": r.get("title"),
-                    "resort": r.get("resort"),  # Keep for backward compatibility
+                    "resort": closest.get("resort"),  # Keep for backward compatibility
                     "resorts": resorts_list,  # Array of resorts with drive times
-                    "distance": f"{r.get('driving_time_minutes', 0):.1f} min" if r.get('driving_time_minutes') else "N/A",
-                    "driveTime": r.get("driving_time_minutes"),
+                    "distance": f"{r['min_driving_time']:.1f} min" if r.get('min_driving_time') else "N/A",
+                    "driveTime": r.get("min_driving_time"),
                     "bedrooms": r.get("bedroomsCount", 0),
                     "bathrooms": r.get("bathrooms", 0),
                     "maxGuests": r.get("maxGuestsLimit", 0),
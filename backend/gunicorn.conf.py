@@ -0,0 +1,22 @@
+"""
+Gunicorn settings for running the Flask API in production.
+The API spends nearly all of its time waiting on Kindred and OpenRouteService,
+so gevent workers let many requests share each process. The gevent worker
+monkey-patches sockets, threading and time.sleep before the app is imported.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+worker_class = 'gevent'
+# Each worker holds its own copy of the resort data (~130 MB), so one worker fits a
+# 512 MB instance; gevent connections, not extra processes, provide the concurrency
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+# Workers read this to split the per-process upstream rate limits
+os.environ['WEB_CONCURRENCY'] = str(workers)
+worker_connections = int(os.environ.get('WORKER_CONNECTIONS', 200))
+
+# Under gevent this only restarts a worker whose event loop stops responding
+# (e.g. stuck in CPU-bound work); it does not limit how long a request may take
+timeout = 120
+graceful_timeout = 30